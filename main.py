@@ -7,19 +7,119 @@ Built on crawl4ai with smart defaults for documentation sites.
 
 import asyncio
 import argparse
+import atexit
+import functools
+import hashlib
 import json
+import os
 import re
 import sys
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from urllib.parse import urlparse
-import tiktoken
+from typing import TYPE_CHECKING, Callable, Optional, List, Dict, Any, Iterator, Sequence, Tuple
 
+if TYPE_CHECKING:
+    import tiktoken
 
-def count_tokens(text: str) -> int:
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+_json_loads: Callable[[bytes], Any]
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoder() -> "tiktoken.Encoding":
+    """Load the cl100k_base encoding once per process."""
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def clear_tokenizer_cache() -> None:
+    """Drop the cached tokenizer so the next count reloads it."""
+    _get_encoder.cache_clear()
+
+
+TOKEN_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "deep-crawl" / "tokens.json"
+)
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+TOKEN_CACHE_MAX_ENTRIES = 5000
+
+
+@functools.lru_cache(maxsize=1)
+def _load_token_cache() -> Dict[str, int]:
+    """Load the on-disk token counts, keyed by content hash, oldest first."""
+    try:
+        with open(TOKEN_CACHE_FILE, "rb") as f:
+            loaded = _json_loads(f.read())
+    except (OSError, ValueError):
+        loaded = {}
+    if not isinstance(loaded, dict):
+        loaded = {}
+
+    # Drop anything a partial or hand-edited file may have left behind
+    cache = {
+        key: value
+        for key, value in loaded.items()
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0
+    }
+
+    atexit.register(_save_token_cache, cache, list(cache))
+    return cache
+
+
+def _save_token_cache(cache: Dict[str, int], loaded_keys: List[str]) -> None:
+    """Write the most recently used token counts back to disk if anything changed."""
+    if list(cache) == loaded_keys:
+        return
+
+    recent = dict(list(cache.items())[-TOKEN_CACHE_MAX_ENTRIES:])
+    tmp_file = TOKEN_CACHE_FILE.with_name(f"{TOKEN_CACHE_FILE.name}.{os.getpid()}.tmp")
+    try:
+        TOKEN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(recent, f)
+        os.replace(tmp_file, TOKEN_CACHE_FILE)
+    except OSError:
+        try:
+            tmp_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def count_tokens(texts: List[str], uncached: Sequence[str] = ()) -> int:
+    """Count tokens across texts, reusing cached counts for previously seen content.
+
+    Texts in ``uncached`` (per-run headers, separators) are counted without being cached.
+    """
+    cache = _load_token_cache()
+    keys = [_content_hash(text) for text in texts]
+
+    # Move hits to the end so the saved cache keeps the most recently used entries
+    hits = {key: cache.pop(key) for key in keys if key in cache}
+    cache.update(hits)
+
+    misses = {key: text for key, text in zip(keys, texts) if key not in cache}
+    batch = [*misses.values(), *uncached]
+    if not batch:
+        return sum(cache[key] for key in keys)
+
+    lengths = [
+        len(tokens)
+        for tokens in _get_encoder().encode_ordinary_batch(batch, num_threads=os.cpu_count() or 1)
+    ]
+    cache.update(zip(misses, lengths))
+
+    return sum(cache[key] for key in keys) + sum(lengths[len(misses) :])
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -63,11 +163,13 @@ def create_parser() -> argparse.ArgumentParser:
     filter_group = parser.add_argument_group("Content Filtering")
     filter_group.add_argument(
         "--sections",
-        help="Include only these sections (comma-separated, e.g., 'api,reference,guides')",
+        help="Include only sections whose header contains one of these names "
+        "(comma-separated, case-insensitive, e.g., 'api,reference,guides')",
     )
     filter_group.add_argument(
         "--exclude-sections",
-        help="Exclude these sections (comma-separated, e.g., 'blog,changelog,download')",
+        help="Exclude sections whose header contains one of these names "
+        "(comma-separated, case-insensitive, e.g., 'blog,changelog,download')",
     )
     filter_group.add_argument(
         "--word-threshold",
@@ -139,15 +241,22 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+_DOMAIN_RE = re.compile(r"[^\w\-]")
+
+
 def generate_output_filename(url: str, format: str) -> str:
+    from urllib.parse import urlparse
+
     parsed = urlparse(url)
-    domain = parsed.netloc.replace("www.", "").replace(".", "-")
+    domain = parsed.netloc.removeprefix("www.").replace(".", "-")
 
-    domain = re.sub(r"[^\w\-]", "", domain)
+    domain = _DOMAIN_RE.sub("", domain)
 
     extensions = {"markdown": "md", "json": "json", "xml": "xml"}
 
-    domain = domain if "docs" in domain else f"docs-{domain}"
+    # A label such as "docs", "api-docs" or "readthedocs" already marks a docs host
+    has_docs_label = any(label.endswith("docs") for label in domain.split("-"))
+    domain = domain if has_docs_label else f"docs-{domain}"
 
     return f"{domain}.{extensions[format]}"
 
@@ -159,31 +268,40 @@ def parse_sections(sections_str: Optional[str]) -> List[str]:
     return [s.strip().lower() for s in sections_str.split(",") if s.strip()]
 
 
+_COOKIE_RE = re.compile(r"(?:^|;)([^=;]*)=([^;]*)")
+
+
 def parse_cookies(cookies_str: Optional[str]) -> Optional[List[Dict[str, Any]]]:
     """Parse cookies from string or file."""
     if not cookies_str:
         return None
- 
-    if Path(cookies_str).exists():
+
+    # A cookie string always contains "=", so only stat arguments that could be a path
+    if "=" not in cookies_str:
         try:
-            with open(cookies_str, "r") as f:
-                return json.load(f)
+            is_file = Path(cookies_str).exists()
+        except OSError:
+            is_file = False
+
+        if not is_file:
+            return None
+
+        try:
+            with open(cookies_str, "rb") as f:
+                return _json_loads(f.read())
         except Exception:
             print(f"Warning: Could not parse cookie file {cookies_str}")
             return None
 
-    cookies = []
-    for cookie in cookies_str.split(";"):
-        if "=" in cookie:
-            name, value = cookie.split("=", 1)
-            cookies.append(
-                {
-                    "name": name.strip(),
-                    "value": value.strip(),
-                    "domain": "",  # Will be set by the browser
-                    "path": "/",
-                }
-            )
+    cookies = [
+        {
+            "name": match.group(1).strip(),
+            "value": match.group(2).strip(),
+            "domain": "",  # Will be set by the browser
+            "path": "/",
+        }
+        for match in _COOKIE_RE.finditer(cookies_str)
+    ]
 
     return cookies if cookies else None
 
@@ -201,25 +319,53 @@ def parse_auth_header(auth_header: Optional[str]) -> Optional[Dict[str, str]]:
     return None
 
 
-def format_results(results: list[Any], include_metadata: bool = True) -> str:
-    """Format the crawl result according to the specified format."""
+def format_metadata_header(result: Any) -> str:
+    """Format the metadata header placed before a crawl result."""
+    metadata = result._crawl_metadata
+    header = "# Documentation Crawl Report\n\n"
+    header += f"**Source:** {metadata.get('url', 'Unknown')}\n"
+    header += f"**Crawled:** {metadata.get('timestamp', 'Unknown')}\n"
+    header += f"**Pages:** {metadata.get('page_count', 'Unknown')}\n"
+    header += f"**Strategy:** {metadata.get('strategy', 'Unknown')}\n\n"
+    header += "---\n\n"
+    return header
+
+
+def iter_format_results(
+    results: list[Any], include_metadata: bool = True
+) -> Iterator[Tuple[str, str]]:
+    """Yield (prefix, content) pairs per page, ready to be written in order.
+
+    The prefix holds the page separator and optional metadata header; the content is the
+    page markdown itself.
+    """
+    for index, result in enumerate(results):
+        prefix = "\n" if index else ""
+        if include_metadata:
+            prefix += format_metadata_header(result)
+        yield prefix, result.markdown
+
 
-    def format_result(result: Any) -> str:
-        output = result.markdown
+_WORD_RE = re.compile(r"\S+")
 
-        if include_metadata:
-            metadata = result._crawl_metadata
-            header = "# Documentation Crawl Report\n\n"
-            header += f"**Source:** {metadata.get('url', 'Unknown')}\n"
-            header += f"**Crawled:** {metadata.get('timestamp', 'Unknown')}\n"
-            header += f"**Pages:** {metadata.get('page_count', 'Unknown')}\n"
-            header += f"**Strategy:** {metadata.get('strategy', 'Unknown')}\n\n"
-            header += "---\n\n"
-            output = header + output
 
-        return output
+def count_words(text: str) -> int:
+    """Count whitespace-separated words without building a list of them."""
+    return sum(1 for _ in _WORD_RE.finditer(text))
 
-    return "\n".join([format_result(result) for result in results])
+
+def postprocess_result(result: Any, args: argparse.Namespace, timestamp: str) -> Any:
+    """Apply section filtering to a successful result and stamp its crawl metadata."""
+    if args.sections or args.exclude_sections:
+        result.markdown = filter_sections(result.markdown, args.sections, args.exclude_sections)
+
+    result._crawl_metadata = {
+        "url": args.url,
+        "timestamp": timestamp,
+        "page_count": 1,
+        "strategy": "single-page",
+    }
+    return result
 
 
 async def main(args):
@@ -278,6 +424,7 @@ async def main(args):
         verbose=args.verbose,
         page_timeout=args.timeout * 1000,
         scraping_strategy=LXMLWebScrapingStrategy(),
+        stream=True,
     )
 
     if not args.quiet:
@@ -296,37 +443,23 @@ async def main(args):
             if not args.quiet and not args.no_progress:
                 print("🔄 Crawling in progress...")
 
+            # Stream pages so each one is post-processed while the crawl continues
             collected_results = []
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
 
-            results = await crawler.arun(args.url, config=config)
-            for result in results:
+            async for result in await crawler.arun(args.url, config=config):
                 if result.success:
-                    content = result.markdown
-                    if args.sections or args.exclude_sections:
-                        content = filter_sections(
-                            content, args.sections, args.exclude_sections
-                        )
-                        result.markdown = content
-
-                    result._crawl_metadata = {
-                        "url": args.url,
-                        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "page_count": 1,
-                        "strategy": "single-page",
-                    }
-                    collected_results.append(result)
+                    collected_results.append(postprocess_result(result, args, timestamp))
                 else:
                     print(
                         f"❌ Crawl failed: {getattr(result, 'error_message', 'Unknown error')}"
                     )
 
-                end_time = time.time()
+            end_time = time.time()
 
             if not args.quiet:
                 print()
-                word_count = sum(
-                    len(result.markdown.split()) for result in collected_results
-                )
+                word_count = sum(count_words(result.markdown) for result in collected_results)
                 print("✅ Crawl completed successfully!")
                 print(f"📊 Stats: {word_count:,} words in {end_time - start_time:.1f}s")
 
@@ -340,24 +473,45 @@ async def main(args):
 
         output_file = args.output or generate_output_filename(args.url, "markdown")
 
-        formatted_output = format_results(
-            collected_results, include_metadata=args.include_metadata
-        )
-
-        token_count = count_tokens(formatted_output)
+        page_contents = []
+        prefixes = []
+        bytes_written = 0
 
         try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(formatted_output)
-
-            if not args.quiet:
-                print(f"💾 Output saved to: {output_file}")
-                print(f"📁 File size: {len(formatted_output.encode('utf-8')):,} bytes")
-                print(f"🔢 Token count: {token_count:,}")
+            with open(output_file, "wb") as f:
+                for prefix, content in iter_format_results(
+                    collected_results, include_metadata=args.include_metadata
+                ):
+                    for chunk in (prefix, content):
+                        encoded = chunk.encode("utf-8")
+                        f.write(encoded)
+                        bytes_written += len(encoded)
+                    if prefix:
+                        prefixes.append(prefix)
+                    page_contents.append(content)
         except Exception as e:
             print(f"❌ Error saving output: {e}")
             sys.exit(1)
 
+        token_count = count_tokens(page_contents, uncached=prefixes)
+
+        if not args.quiet:
+            print(f"💾 Output saved to: {output_file}")
+            print(f"📁 File size: {bytes_written:,} bytes")
+            print(f"🔢 Token count: {token_count:,}")
+
+
+_HEADER_RE = re.compile(r"^#[^\n]*", re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_section_matcher(sections_str: Optional[str]) -> Optional[re.Pattern[str]]:
+    """Build one alternation regex that matches any of the given section names."""
+    sections = dict.fromkeys(parse_sections(sections_str))
+    if not sections:
+        return None
+    return re.compile("|".join(map(re.escape, sections)))
+
 
 def filter_sections(
     content: str, include_sections: Optional[str], exclude_sections: Optional[str]
@@ -366,34 +520,35 @@ def filter_sections(
     if not content:
         return content
 
-    lines = content.split("\n")
-    filtered_lines = []
-    include_current = True
+    include_matcher = _compile_section_matcher(include_sections)
+    exclude_matcher = _compile_section_matcher(exclude_sections)
 
-    include_list = parse_sections(include_sections)
-    exclude_list = parse_sections(exclude_sections)
-
-    for line in lines:
-        # Check if this is a header line
-        if line.startswith("#"):
-            header_text = line.lstrip("#").strip().lower()
-
-            # Determine if we should include this section
-            if include_list:
-                include_current = any(
-                    section in header_text for section in include_list
-                )
-            elif exclude_list:
-                include_current = not any(
-                    section in header_text for section in exclude_list
-                )
-            else:
-                include_current = True
+    # Content before the first header is always kept
+    kept = []
+    section_start = 0
+    include_current = True
 
+    for match in _HEADER_RE.finditer(content):
         if include_current:
-            filtered_lines.append(line)
+            kept.append(content[section_start : match.start()])
+        section_start = match.start()
+
+        header_text = match.group().lstrip("#").strip().lower()
+
+        # Determine if we should include this section
+        if include_matcher:
+            include_current = include_matcher.search(header_text) is not None
+        elif exclude_matcher:
+            include_current = exclude_matcher.search(header_text) is None
+        else:
+            include_current = True
+
+    if include_current:
+        kept.append(content[section_start:])
+        return "".join(kept)
 
-    return "\n".join(filtered_lines)
+    # Dropping the final section leaves the newline that preceded it
+    return "".join(kept).removesuffix("\n")
 
 
 def cli():